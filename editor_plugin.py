@@ -5,24 +5,46 @@ Author: michele.silva@gmail.com
 License: GPLv2
 Site: https://github.com/mchelem/terminator-editor-plugin
 """
-import inspect
 import os
 import re
 import shlex
 import subprocess
+import sys
 from terminatorlib import plugin, config
 
 AVAILABLE = ['EditorPlugin']
 
-# Global state to track git diff context
-_git_diff_context = {'file': None, 'line': None}
+class _GitDiffContext(object):
+    """ Record of the last seen git diff file and hunk headers. """
+    __slots__ = ('file', 'line')
+
+    def __init__(self):
+        self.file = None
+        self.line = None
+
+# Global state to track git diff context; slotted attribute access is a
+# C-level offset load instead of a string-keyed dict lookup.
+_git_diff_context = _GitDiffContext()
 
 DEFAULT_COMMAND = 'gvim --remote-silent +{line} {filepath}'
 # Basic regex for file paths with line numbers (used when git_diff_support is disabled)
-DEFAULT_REGEX = r'(?:^|(?<= ))(?![ab]/)([a-zA-Z0-9_/.\-]+\.[a-zA-Z0-9]+)(:[0-9]+)?(:[0-9]+)?(?=$|[ \t])'
-# Extended regex including git diff patterns (used when git_diff_support is enabled)
-GIT_DIFF_REGEX = r'(?<=--- a/)[^ \t\n]+|(?<=\+\+\+ b/)[^ \t\n]+|(?<=diff --git a/)[^ \t\n]+|@@ [^@]+ @@|' + DEFAULT_REGEX
+DEFAULT_REGEX = r'(?:^|(?<= ))(?![ab]/)(?P<file>[a-zA-Z0-9_/.\-]+\.[a-zA-Z0-9]+)(?::(?P<line>[0-9]+))?(?::(?P<column>[0-9]+))?(?=$|[ \t])'
+# Extended regex including git diff patterns (used when git_diff_support is
+# enabled). The header prefixes are consumed as plain alternatives rather
+# than asserted with lookbehinds, which the engine would otherwise retry at
+# every input position; get_filepath strips them off the match again.
+GIT_DIFF_REGEX = r'(?:--- a/|\+\+\+ b/|diff --git a/)[^ \t\n]+|@@ [^@]+ @@|' + DEFAULT_REGEX
 DEFAULT_GROUPS = 'file line column'
+# Bound for the per-instance resolved-filepath cache
+_FILEPATH_CACHE_SIZE = 256
+
+# Module-level aliases for the path helpers used on every click: binding
+# them once skips the os -> path -> attribute chain per call.
+_isabs = os.path.isabs
+_lexists = os.path.lexists
+# Pre-compiled patterns so the hot callback path skips the sre cache lookup
+_DEFAULT_RE = re.compile(DEFAULT_REGEX)
+_HUNK_RE = re.compile(r'@@ -\d+,?\d* \+(\d+)')
 DEFAULT_OPEN_IN_CURRENT_TERM = False
 DEFAULT_GIT_DIFF_SUPPORT = True
 
@@ -40,7 +62,7 @@ class EditorPlugin(plugin.URLHandler):
         self.plugin_name = self.__class__.__name__
         self.config = config.Config()
         self.check_config()
-        self.match = self.config.plugin_get(self.plugin_name, 'match')
+        self.match = self._cfg['match']
         if hasattr(self.match, 'decode'):
             self.match = self.match.decode('string_escape')
 
@@ -62,17 +84,59 @@ class EditorPlugin(plugin.URLHandler):
         if config["git_diff_support"]:
             config['match'] = GIT_DIFF_REGEX
         
-        self.config.plugin_set_config(self.plugin_name, config)
-        self.config.save()
+        # Cache the values the callback path needs so it doesn't have to walk
+        # the Terminator config dict on every clicked URL.
+        self._cfg = config
+        self._git_diff_enabled = config['git_diff_support']
+        # A user-supplied 'match' pattern (see the README) can't be parsed
+        # with the built-in named groups, so keep it compiled alongside the
+        # positional group names from the 'groups' key; get_filepath falls
+        # back to those when this is set.
+        if config['match'] in (DEFAULT_REGEX, GIT_DIFF_REGEX):
+            self._custom_match_re = None
+        else:
+            self._custom_match_re = re.compile(config['match'])
+            self._groups = config['groups'].split()
+        self._command = config['command']
+        # Split the command template around its placeholders once, so the
+        # callback joins segments instead of rescanning the whole string
+        # three times with str.replace.
+        self._cmd_parts = re.split(r'(\{filepath\}|\{line\}|\{column\})',
+                                   self._command)
+        # Tokenize the template once as well: shlex.split is a pure-Python
+        # character state machine, and only the placeholder slots vary
+        # between clicks. As a bonus, substituted values with spaces stay
+        # single arguments instead of being re-split.
+        self._cmd_argv_template = shlex.split(self._command)
+        self._open_in_current_term = config['open_in_current_term']
+        libdir = config.get('libdir')
+        self._libdir = os.path.expanduser(libdir) if libdir else None
+        # Resolved (strmatch, cwd) -> (filepath, line, column); reset
+        # whenever the config is (re)loaded since libdir affects results.
+        self._filepath_cache = {}
+
+        # Only persist when something actually changed: save() rewrites the
+        # whole Terminator config file, which is wasted IO on every startup
+        # once the defaults are stored. Saved values come back as strings,
+        # so compare the stringified forms.
+        if saved_config is None or \
+                {k: str(v) for k, v in saved_config.items()} != \
+                {k: str(v) for k, v in config.items()}:
+            self.config.plugin_set_config(self.plugin_name, config)
+            self.config.save()
 
     def get_terminal(self):
         # HACK: Because the current working directory is not available to
-        # plugins, we need to use the inspect module to climb up the stack to
-        # the Terminal object and call get_cwd() from there.
-        for frameinfo in inspect.stack():
-            frameobj = frameinfo[0].f_locals.get('self')
-            if frameobj and frameobj.__class__.__name__ == 'Terminal':
+        # plugins, we need to climb up the stack to the Terminal object and
+        # call get_cwd() from there. Walk raw frame objects instead of using
+        # inspect.stack(), which reads and formats source context for every
+        # frame on the stack.
+        frame = sys._getframe(1)
+        while frame is not None:
+            frameobj = frame.f_locals.get('self')
+            if frameobj is not None and type(frameobj).__name__ == 'Terminal':
                 return frameobj
+            frame = frame.f_back
 
     def get_cwd(self):
         """ Return current working directory. """
@@ -84,108 +148,170 @@ class EditorPlugin(plugin.URLHandler):
         """ Return True if we should open the file. """
         # HACK: Because the plugin doesn't tell us we should open or copy
         # the command, we need to climb the stack to see how we got here.
-        return inspect.stack()[3][3] == 'open_url'
-
-    def update_git_diff_context(self, strmatch):
-        """ Update global context when we see git diff headers or hunk markers """
-        global _git_diff_context
-
-        # Check if this is a filename match (from lookbehind patterns)
-        # These won't have the --- or +++ prefix since lookbehind excludes them
-        # We identify them by checking if they look like file paths (contain / or .)
-        if ('/' in strmatch or '.' in strmatch) and not strmatch.startswith('@@'):
-            # This is likely a file path from git diff header
-            _git_diff_context['file'] = strmatch
-            _git_diff_context['line'] = None
-            return
-
-        # Check for hunk header: @@ -71,7 +71,7 @@
-        hunk_match = re.search(r'@@ -\d+,?\d* \+(\d+)', strmatch)
-        if hunk_match:
-            _git_diff_context['line'] = hunk_match.group(1)
-            return
+        return sys._getframe(3).f_code.co_name == 'open_url'
 
     def search_filepath_in_libdir(self, group_value):
-        filename = group_value.split('/')[-1]
-        libdir = self.config.plugin_get(self.plugin_name, 'libdir')
+        if not self._libdir:
+            return None
+        # rpartition only materializes the trailing segment instead of a
+        # throwaway list of every path component.
+        filename = group_value.rpartition('/')[2]
+
+        # Explicit scandir-based DFS instead of os.walk: DirEntry carries
+        # cached stat info, and we can return as soon as the name is found
+        # without buffering whole directory listings first.
+        stack = [self._libdir]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as entries:
+                    for entry in entries:
+                        if entry.is_file(follow_symlinks=False):
+                            if entry.name == filename:
+                                return entry.path
+                        elif entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+            except OSError:
+                continue
+        return None
 
-        for dirpath, dirnames, filenames in os.walk(os.path.expanduser(libdir)):
-            for name in filenames:
-                if name == filename:
-                    return os.path.join(dirpath, name)
+    def _resolve_file(self, group_value, cwd_prefix):
+        """ Resolve a matched file group against the cwd and the libdir.
+
+        Returns (filepath, cacheable); libdir results are flagged as not
+        cacheable since that part of the filesystem can change between
+        clicks.
+        """
+        # One lexists check per candidate: absolute paths are taken as-is
+        # or rejected, relative ones are tried against the cwd before
+        # falling back to the libdir search. lexists skips the extra
+        # symlink-follow stat that exists performs.
+        if _isabs(group_value):
+            return (group_value if _lexists(group_value) else None), True
+        candidate = cwd_prefix + group_value
+        if _lexists(candidate):
+            return candidate, True
+        return self.search_filepath_in_libdir(group_value), False
 
     def get_filepath(self, strmatch):
-        global _git_diff_context
         filepath = None
         line = column = '1'
+        # Climb the stack for the cwd once; every branch below reuses it.
+        # The paths joined onto it are always relative, so a precomputed
+        # prefix turns each os.path.join into a single concat. get_cwd can
+        # come up empty; fall back to plain relative paths in that case.
+        cwd = self.get_cwd()
+        if cwd:
+            cwd_prefix = cwd if cwd.endswith('/') else cwd + '/'
+        else:
+            cwd = ''
+            cwd_prefix = ''
 
-        config = self.config.plugin_get_config(self.plugin_name)
-        git_diff_enabled = config.get('git_diff_support', DEFAULT_GIT_DIFF_SUPPORT)
-        
-        # Git diff processing (only if enabled)
-        if git_diff_enabled:
-            # Always update context for git diff tracking
-            self.update_git_diff_context(strmatch)
-
-            # Special handling for git diff hunk headers (@@ -x,y +a,b @@)
-            # Make these clickable using the cached file from previous --- or +++ line
+        # Git diff processing (only if enabled). The context updates are
+        # inlined with the dispatch so each diff token is classified and
+        # its hunk header parsed exactly once.
+        if self._git_diff_enabled:
+            # Hunk headers (@@ -x,y +a,b @@): remember the target line and
+            # make the header clickable via the file cached from the
+            # previous --- or +++ line.
             if strmatch.startswith('@@'):
-                hunk_match = re.search(r'@@ -\d+,?\d* \+(\d+)', strmatch)
-                if hunk_match and _git_diff_context.get('file'):
-                    filepath = os.path.join(self.get_cwd(), _git_diff_context['file'])
-                    line = hunk_match.group(1)
-                    return filepath, line, column
-            
-            # Special handling for git diff file headers (matched via lookbehind)
-            # strmatch will be just the filename (e.g., "app-be/composer.json")
-            elif ('/' in strmatch or '.' in strmatch):
-                filepath = os.path.join(self.get_cwd(), strmatch)
-                # Use cached line number if available from previous @@ header
-                if _git_diff_context.get('line'):
-                    line = _git_diff_context['line']
+                hunk_match = _HUNK_RE.match(strmatch)
+                if hunk_match:
+                    _git_diff_context.line = hunk_match.group(1)
+                    if _git_diff_context.file:
+                        filepath = cwd_prefix + _git_diff_context.file
+                        line = _git_diff_context.line
                 return filepath, line, column
 
-        config = self.config.plugin_get_config(self.plugin_name)
-        match = re.match(config['match'], strmatch)
-        if not match:
-            return filepath, line, column
+            # File headers arrive with their literal prefix attached since
+            # the pattern consumes it; strip the prefix to get the path.
+            if strmatch.startswith(('--- a/', '+++ b/')):
+                header_path = strmatch[6:]
+            elif strmatch.startswith('diff --git a/'):
+                header_path = strmatch[13:]
+            else:
+                header_path = None
+            if header_path is not None:
+                _git_diff_context.file = header_path
+                _git_diff_context.line = None
+                return cwd_prefix + header_path, line, column
 
-        groups = match.groups()
-        group_names = config['groups'].split()
+        # Repeat clicks on the same token in the same cwd are common in a
+        # long-lived terminal; serve those straight from the cache.
+        key = (strmatch, cwd)
+        cached = self._filepath_cache.get(key)
+        if cached is not None:
+            return cached
 
-        for group_value, group_name in zip(groups, group_names):
-            if group_value is None:
-                continue
-            # Clean up colon prefix from line/column groups
-            if group_value.startswith(':'):
-                group_value = group_value[1:]
-
-            if group_name == 'file':
-                # Try absolute path first
-                if os.path.isabs(group_value) and os.path.exists(group_value):
-                    filepath = group_value
-                # Try relative to cwd
-                else:
-                    filepath = os.path.join(self.get_cwd(), group_value)
-                    if not os.path.exists(filepath):
-                        filepath = self.search_filepath_in_libdir(group_value)
-            elif group_name == 'line' and group_value:
-                line = group_value
-            elif group_name == 'column' and group_value:
-                column = group_value
-        return filepath, line, column
+        cacheable = True
+        if self._custom_match_re is not None:
+            # A user-configured 'match' pattern drives the highlight, so it
+            # has to drive the parse too: map its positional groups through
+            # the 'groups' config key like the original resolver did.
+            match = self._custom_match_re.match(strmatch)
+            if match:
+                for group_value, group_name in zip(match.groups(),
+                                                   self._groups):
+                    if group_value is None:
+                        continue
+                    # Clean up colon prefix from line/column groups
+                    if group_value.startswith(':'):
+                        group_value = group_value[1:]
+                    if group_name == 'file':
+                        filepath, cacheable = \
+                            self._resolve_file(group_value, cwd_prefix)
+                    elif group_name == 'line' and group_value:
+                        line = group_value
+                    elif group_name == 'column' and group_value:
+                        column = group_value
+        else:
+            # Anything left is a plain path[:line[:column]] token: the diff
+            # alternations were dispatched above on their literal prefixes,
+            # so the simple pattern is enough even with git diff support
+            # on. The pattern names its groups, so the fields can be pulled
+            # out directly; the ':' separators stay outside the captures.
+            match = _DEFAULT_RE.match(strmatch)
+            if match:
+                filepath, cacheable = \
+                    self._resolve_file(match.group('file'), cwd_prefix)
+                line = match.group('line') or line
+                column = match.group('column') or column
+
+        result = (filepath, line, column)
+        if cacheable:
+            if len(self._filepath_cache) >= _FILEPATH_CACHE_SIZE:
+                self._filepath_cache.clear()
+            self._filepath_cache[key] = result
+        return result
 
     def callback(self, strmatch):
+        if not strmatch:
+            return None
+        # Fast rejection (built-in patterns only): without a slash, a dot
+        # or a hunk-header prefix the token cannot resolve to a file. A
+        # custom 'match' pattern may accept other shapes, so it gets no
+        # shortcut.
+        if self._custom_match_re is None and '/' not in strmatch \
+                and '.' not in strmatch and not strmatch.startswith('@@'):
+            return None
         filepath, line, column = self.get_filepath(strmatch)
         if filepath:
-            command = self.config.plugin_get(self.plugin_name, 'command')
-            command = command.replace('{filepath}', filepath)
-            command = command.replace('{line}', line)
-            command = command.replace('{column}', column)
+            subs = {'{filepath}': filepath, '{line}': line, '{column}': column}
+            command = ''.join(subs.get(part, part) for part in self._cmd_parts)
             if self.open_url():
-                if self.config.plugin_get(self.plugin_name, 'open_in_current_term'):
+                if self._open_in_current_term:
                     self.get_terminal().vte.feed_child((command+'\n').encode())
                 else:
-                    subprocess.Popen(shlex.split(command))
+                    argv = [part.replace('{filepath}', filepath)
+                                .replace('{line}', line)
+                                .replace('{column}', column)
+                            for part in self._cmd_argv_template]
+                    # On CPython 3.13+ with a closefrom-capable libc this
+                    # call rides posix_spawn instead of forking
+                    # Terminator's whole address space; 3.8-3.12 only take
+                    # that path with close_fds=False and fork here
+                    # regardless, which we accept rather than leak our fds
+                    # into the editor. Adding preexec_fn/cwd/pass_fds
+                    # would force the fork fallback on every version.
+                    subprocess.Popen(argv, close_fds=True)
                 return '--version'
             return command